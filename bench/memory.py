@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Peak memory benchmark for parsing, solving and rendering
+synthetic staves, using ``tracemalloc``.
+
+Each phase is traced on its own, so the peak of a phase
+doesn't include the memory of the objects created before it
+(e.g. the solving peak doesn't include the parsed staff).
+"""
+import json
+import random
+import time
+import tracemalloc
+
+from audiolazy import midi2str
+import click
+
+from fretfinder.algorithm import find_strings
+from fretfinder.guitar import Guitar
+from fretfinder.score import Staff, Tablature
+from fretfinder.stress import random_staff
+
+
+def traced(func, *args, **kwargs):
+    """Call the function, returning a ``(result, peak, seconds)`` tuple
+    with the peak memory in bytes traced during the call.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def render(staff, guitar, strings, width):
+    return Tablature(staff=staff, guitar=guitar,
+                     strings=strings).ascii_tab(width=width)
+
+
+def edit(staff, guitar, strings):
+    """Replace two entries in the middle of a tablature,
+    whose cost should depend on the edited segments,
+    not on the staff length.
+    """
+    tab = Tablature(staff=staff, guitar=guitar, strings=strings)
+    tab.replace(len(staff) // 2, "C4 D4")
+
+
+def random_walk_raw_str(rng, guitar, size, *, max_interval=4,
+                        rest_rate=.2, chord_rate=.05):
+    """Staff string of a random melody whose consecutive notes
+    are at most ``max_interval`` semitones apart
+    (uniformly random notes, like the ones from
+    ``fretfinder.stress.random_staff``,
+    often require an exponential number of steps),
+    with some random rests and chords.
+    """
+    low = min(guitar.midi) + guitar.min_fret
+    high = max(guitar.midi) + guitar.max_fret
+    note = rng.randint(low, high)
+    entries = []
+    for unused in range(size):
+        choice = rng.random()
+        if choice < rest_rate:
+            entries.append("R")
+        elif choice < rest_rate + chord_rate:
+            entries.append(random_staff(rng, guitar, 1, rest_rate=0,
+                                        chord_rate=1).raw_str)
+        else:
+            note += rng.randint(-max_interval, max_interval)
+            note = min(max(note, low), high)
+            entries.append(midi2str(note))
+    return " ".join(entries)
+
+
+def benchmark(size, *, guitar, seed, width):
+    """Measure each phase for a random staff with ``size`` entries."""
+    raw_str = random_walk_raw_str(random.Random(seed), guitar, size)
+    staff, parse_peak, parse_time = traced(Staff, raw_str)
+    strings, solve_peak, solve_time = traced(find_strings, staff, guitar)
+    unused, render_peak, render_time = traced(render, staff, guitar,
+                                              strings, width)
+    unused, edit_peak, edit_time = traced(edit, staff, guitar, strings)
+    return {
+        "size": size,
+        "parse": {"peak": parse_peak, "seconds": parse_time},
+        "solve": {"peak": solve_peak, "seconds": solve_time},
+        "render": {"peak": render_peak, "seconds": render_time},
+        "edit": {"peak": edit_peak, "seconds": edit_time},
+    }
+
+
+@click.command()
+@click.option(
+    "--sizes", "-s",
+    default="10000,100000,1000000",
+    show_default=True,
+    help="Comma-separated number of staff entries for each run.",
+)
+@click.option(
+    "--tuning", "-t",
+    default="Guitar6",
+    show_default=True,
+    help="Guitar tuning name or whitespace-separated note names.",
+)
+@click.option(
+    "--max-fret", "-M",
+    default=14,
+    show_default=True,
+    help="Biggest fret number available for the guitar.",
+)
+@click.option(
+    "--seed",
+    default=0,
+    show_default=True,
+    help="Seed for the random staff generator.",
+)
+@click.option(
+    "--width", "-w",
+    default=79,
+    show_default=True,
+    help="Width of the rendered ASCII tablature.",
+)
+@click.option(
+    "--json-output/--table-output", "-j",
+    default=False,
+    show_default=True,
+    help="Write a JSON line for each size instead of a table.",
+)
+def main(*, sizes, tuning, max_fret, seed, width, json_output):
+    """Benchmark the peak memory of each phase (in MiB)
+    for random staves with the given sizes
+    (see ``random_walk_raw_str``),
+    and the time of a single tablature edit (in milliseconds).
+    """
+    guitar = Guitar(tuning, max_fret=max_fret)
+    if not json_output:
+        click.echo(f"{'size':>9} {'parse':>9} {'solve':>9} {'render':>9}"
+                   f" {'edit':>9} {'edit ms':>9}")
+    for size in map(int, sizes.split(",")):
+        result = benchmark(size, guitar=guitar, seed=seed, width=width)
+        if json_output:
+            click.echo(json.dumps(result))
+        else:
+            click.echo(f"{size:>9}" + "".join(
+                f" {result[phase]['peak'] / 2 ** 20:>9.2f}"
+                for phase in ["parse", "solve", "render", "edit"]
+            ) + f" {result['edit']['seconds'] * 1e3:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
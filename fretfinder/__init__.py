@@ -1,4 +1,5 @@
-from .algorithm import find_strings  # noqa
+from .algorithm import (find_strings, find_strings_async,  # noqa
+                        find_strings_batch)
 from .guitar import Guitar  # noqa
 from .score import Staff, Tablature  # noqa
 
@@ -1,87 +1,199 @@
+import json
 import logging
 
+from .batch import IncompleteJobError, merge_shards, parse_shard, run_shard
 from .guitar import Guitar, DEFAULT_TUNINGS
 from .score import Staff, Tablature
 
 import click
 
 
-@click.command()
-@click.option(
-    "--tuning", "-t",
-    default="Guitar6",
-    show_default=True,
-    help="Guitar tuning name or whitespace-separated note names. "
-         "Possible tuning names: " +
-         ", ".join(f"{k} ({v})" for k, v in DEFAULT_TUNINGS.items()) +
-         ".",
-)
-@click.option(
-    "--min-fret", "-m",
-    default=0,
-    show_default=True,
-    help="Smallest fret number for the output, "
-         "it's tipically zero for free strings, "
-         "or the fret number of the tune clamp (capo) position.",
-)
-@click.option(
-    "--max-fret", "-M",
-    default=24,
-    show_default=True,
-    help="Biggest fret number available for the guitar.",
+class DefaultCommandGroup(click.Group):
+    """Group of commands that calls the ``default_command``
+    when the first argument isn't the name of a command.
+    """
+
+    def __init__(self, *args, default_command, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if not args or args[0] not in self.commands:
+            args = [self.default_command] + args
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultCommandGroup, default_command="tab")
+def main():
+    pass
+
+
+def apply_options(*decorators):
+    def decorator(func):
+        for option in reversed(decorators):
+            func = option(func)
+        return func
+    return decorator
+
+
+def setup_logging(verbose):
+    logging.basicConfig(
+        format="[%(levelname)s %(name)s] %(message)s",
+        level=[logging.WARNING, logging.INFO, logging.DEBUG][min(verbose, 2)],
+    )
+
+
+def shard_callback(ctx, param, value):
+    try:
+        return parse_shard(value)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc))
+
+
+algorithm_options = apply_options(
+    click.option(
+        "--tuning", "-t",
+        default="Guitar6",
+        show_default=True,
+        help="Guitar tuning name or whitespace-separated note names. "
+             "Possible tuning names: " +
+             ", ".join(f"{k} ({v})" for k, v in DEFAULT_TUNINGS.items()) +
+             ".",
+    ),
+    click.option(
+        "--min-fret", "-m",
+        default=0,
+        show_default=True,
+        help="Smallest fret number for the output, "
+             "it's tipically zero for free strings, "
+             "or the fret number of the tune clamp (capo) position.",
+    ),
+    click.option(
+        "--max-fret", "-M",
+        default=24,
+        show_default=True,
+        help="Biggest fret number available for the guitar.",
+    ),
+    click.option(
+        "--allow-open/--disallow-open",
+        default=True,
+        show_default=True,
+        help="Flag to choose if open strings should be allowed, i.e., "
+             "if the min-fret value "
+             "should be considered fingerless (open string) or fingered.",
+    ),
+    click.option(
+        "--reverse/--no-reverse", "-r",
+        default=False,
+        show_default=True,
+        help="Flag to choose if the guitar tuning order should be used "
+             "for trial-and-error by the fret finder algorithm, "
+             "or if it should be reversed.",
+    ),
+    click.option(
+        "--window-size", "-w",
+        default=7,
+        show_default=True,
+        help="Size of history to be considered by the algorithm.",
+    ),
+    click.option(
+        "--distinct-only/--no-distinct-removal", "-d",
+        default=False,
+        show_default=True,
+        help="Choose if consecutive repeated fret numbers in history "
+             "should be seen as just one history entry by the algorithm.",
+    ),
 )
-@click.option(
-    "--allow-open/--disallow-open",
-    default=True,
-    show_default=True,
-    help="Flag to choose if open strings should be allowed, i.e., "
-         "if the min-fret value "
-         "should be considered fingerless (open string) or fingered.",
+
+verbose_option = click.option(
+    "-v", "--verbose",
+    count=True,
+    help="Increase the verbosity level. "
+         "Use twice to show the adaptive algorithm debug information.",
 )
+
+
+@main.command(epilog="Use the batch and merge commands "
+                     "for processing a corpus with a staff per line, "
+                     "e.g. \"fretfinder batch --help\".")
+@algorithm_options
+@verbose_option
 @click.option(
-    "--reverse/--no-reverse", "-r",
-    default=False,
+    "--output-format", "-f",
+    type=click.Choice(["ascii", "json", "binary"]),
+    default="ascii",
     show_default=True,
-    help="Flag to choose if the guitar tuning order should be used "
-         "for trial-and-error by the fret finder algorithm, "
-         "or if it should be reversed.",
+    help="Output format: an ASCII tablature, "
+         "JSON with the string/fret pairs of each tablature column, "
+         "or these pairs packed as bytes.",
 )
+@click.argument("staff", type=Staff)
+def tab(*, tuning, min_fret, max_fret, verbose, output_format, staff,
+        **kwargs):
+    """Show the tablature of a single staff (default command)."""
+    setup_logging(verbose)
+    result = Tablature(
+        staff=staff,
+        guitar=Guitar(tuning, min_fret=min_fret, max_fret=max_fret),
+        **kwargs,
+    )
+    if output_format == "json":
+        click.echo(result.to_json())
+    elif output_format == "binary":
+        click.get_binary_stream("stdout").write(result.to_bytes())
+    else:
+        terminal_width = click.get_terminal_size()[0]
+        click.echo(result.ascii_tab(width=terminal_width))
+
+
+@main.command()
+@algorithm_options
+@verbose_option
 @click.option(
-    "--window-size", "-w",
-    default=7,
+    "--shard", "-s",
+    default="0/1",
     show_default=True,
-    help="Size of history to be considered by the algorithm.",
+    callback=shard_callback,
+    help="Shard to be processed, as \"index/count\", "
+         "where the index starts from zero.",
 )
 @click.option(
-    "--distinct-only/--no-distinct-removal", "-d",
-    default=False,
+    "--checkpoint", "-c",
+    type=click.IntRange(1),
+    default=100,
     show_default=True,
-    help="Choose if consecutive repeated fret numbers in history "
-         "should be seen as just one history entry by the algorithm.",
-)
-@click.option(
-    "-v", "--verbose",
-    count=True,
-    help="Increase the verbosity level. "
-         "Use twice to show the adaptive algorithm debug information.",
+    help="Number of results between writes to the disk.",
 )
-@click.argument("staff", type=Staff)
-def main(*, tuning, min_fret, max_fret, allow_open, reverse,
-         window_size, distinct_only, verbose, staff):
-    logging.basicConfig(
-        format="[%(levelname)s %(name)s] %(message)s",
-        level=[logging.WARNING, logging.INFO, logging.DEBUG][min(verbose, 2)],
-    )
-    result = Tablature(
-        staff=staff,
+@click.argument("corpus", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_dir", type=click.Path(file_okay=False))
+def batch(*, tuning, min_fret, max_fret, verbose, **kwargs):
+    """Find the strings of a corpus shard.
+
+    The CORPUS file should have one staff per line,
+    and the results are appended to a shard file in the OUTPUT_DIR.
+    Staves with a result in OUTPUT_DIR are skipped,
+    so an interrupted job can be restarted with the same command.
+    Use the merge command to get the results when all shards finish.
+    """
+    setup_logging(verbose)
+    run_shard(
         guitar=Guitar(tuning, min_fret=min_fret, max_fret=max_fret),
-        allow_open=allow_open,
-        reverse=reverse,
-        window_size=window_size,
-        distinct_only=distinct_only,
+        **kwargs,
     )
-    terminal_width = click.get_terminal_size()[0]
-    click.echo(result.ascii_tab(width=terminal_width))
+
+
+@main.command()
+@click.argument("corpus", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_dir", type=click.Path(exists=True, file_okay=False))
+def merge(corpus, output_dir):
+    """Show the results of a finished batch job as JSON lines,
+    one for each line of the CORPUS file.
+    """
+    try:
+        for strings in merge_shards(corpus, output_dir):
+            click.echo(json.dumps(strings))
+    except IncompleteJobError as exc:
+        raise click.ClickException(str(exc))
 
 
 if __name__ == "__main__":
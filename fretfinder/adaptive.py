@@ -61,12 +61,18 @@ class AdaptiveAlgorithm:
     should be performed only by some adaptive action.
     One can register/remove/include/modify state handlers
     while an instance is running
-    by changing the concrete class' ``state_handlers`` dictionary.
+    by changing the instance's ``state_handlers`` dictionary,
+    a copy of the concrete class' dictionary.
     Likewise, adaptive actions are functions (methods)
     registered in the ``adaptive_actions`` dictionary,
     which can also be changed,
     and the initial ones should be implemented in the concrete class
     by using the ``@AdaptiveAction`` decorator.
+
+    The class dictionaries are never changed after the class creation,
+    and every instance has its own copies of them,
+    so distinct instances can run concurrently in distinct threads,
+    as long as they don't share the same cursor.
     """
     state = "reject"
     state_args = tuple()
@@ -81,9 +87,17 @@ class AdaptiveAlgorithm:
         ).to_json(initial=True))
 
     def run(self):
+        for unused in self.iter_steps():
+            pass
+        return self.state == "accept"
+
+    def iter_steps(self):
+        """Generator that performs a single step for each iteration
+        until the algorithm halts (i.e., accepts or rejects).
+        """
         while self.state not in ["accept", "reject"]:
             self.step()
-        return self.state == "accept"
+            yield
 
     def step(self):
         state_handler = self.state_handlers[self.state]
@@ -105,8 +119,9 @@ class AADecorator:
         self.func = func
 
     def __set_name__(self, owner, name):
-        if not hasattr(owner, self.storage_name):
-            setattr(owner, self.storage_name, {})
+        if self.storage_name not in vars(owner):  # Don't touch the parent's
+            inherited = getattr(owner, self.storage_name, {})
+            setattr(owner, self.storage_name, inherited.copy())
         getattr(owner, self.storage_name)[name] = self.func
 
 
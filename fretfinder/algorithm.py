@@ -1,6 +1,13 @@
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from itertools import count
+import asyncio
 import json
 import logging
+import threading
+import time
 
 from .adaptive import (AAStateHandler, AdaptiveAction, AdaptiveAlgorithm,
                        StateHandlerResult)
@@ -11,7 +18,7 @@ logger = logging.getLogger("algorithm")
 
 
 def find_strings(staff, guitar, *, allow_open=True, reverse=False,
-                 window_size=7, distinct_only=False):
+                 window_size=7, distinct_only=False, precheck=True):
     """Automated guitar fingerings "fret finder"
     based on an adaptive algorithm.
 
@@ -40,17 +47,59 @@ def find_strings(staff, guitar, *, allow_open=True, reverse=False,
         Switch to enable/disable a filter
         to remove consecutive repeated fret numbers
         from the window history.
+    precheck : bool
+        Switch to enable/disable the ``dist_range`` lower bound
+        evaluation (see ``get_min_dist_range``)
+        that skips the adaptive algorithm attempts
+        that are known to fail beforehand.
+        It doesn't change the result.
 
     Returns
     -------
     A list of lists with the number of the strings for each input note.
 
+    Notes
+    -----
+    This function is reentrant: all the algorithm state is stored
+    in cursor and automaton instances created for each call,
+    while the ``staff`` and the ``guitar`` are only read,
+    so concurrent calls in distinct threads can share them.
+    The module-level loggers are shared as well,
+    which is fine since the ``logging`` module handlers are thread-safe.
+
     See Also
     --------
     fretfinder.score.Tablature :
         An alternative way to call this algorithm.
+    find_strings_batch :
+        Concurrent calls for several staves.
+    find_strings_async :
+        Coroutine version of this function.
+    iter_find_strings :
+        Step-by-step evaluation of this algorithm.
     """
     cursor = IOCursor(staff=staff, guitar=guitar)
+    for unused in iter_find_strings(
+        cursor,
+        guitar=guitar,
+        allow_open=allow_open,
+        reverse=reverse,
+        window_size=window_size,
+        distinct_only=distinct_only,
+        precheck=precheck,
+    ):
+        pass
+    return cursor.output_tape
+
+
+def iter_find_strings(cursor, *, guitar, **kwargs):
+    """Generator that applies the ``find_strings`` algorithm
+    on the output tape of the given ``IOCursor``,
+    performing a single step for each iteration
+    (either an adaptive algorithm step
+    or a cursor movement through a chord/rest).
+    See ``find_strings`` for the remaining parameters.
+    """
     while not cursor.after_end():
         if cursor.at_chord():
             cursor.current_output = find_multi_fingering(
@@ -63,37 +112,163 @@ def find_strings(staff, guitar, *, allow_open=True, reverse=False,
                 "move": "R",
             }))
             cursor.to_right()
+            yield
         elif cursor.at_possible_note():
-            logger.info(json.dumps({"found": "melody"}))
-            for dist_range in count(3):
-                logger.info(json.dumps({
-                    "processing": "melody",
-                    "dist_range": dist_range,
-                }))
-                if AdaptiveFretFinderMelody(
-                    cursor=cursor,
-                    guitar=guitar,
-                    dist_range=dist_range,
-                    allow_open=allow_open,
-                    reverse=reverse,
-                    window_size=window_size,
-                    distinct_only=distinct_only,
-                ).run():
-                    logger.info(json.dumps({
-                        "processed": "melody",
-                        "dist_range": dist_range,
-                    }))
-                    break  # Finished in an "accept" state
+            yield from iter_melody_steps(cursor, guitar=guitar, **kwargs)
         else:  # A rest or an impossible note
             logger.info(json.dumps({
                 "found": "rest" if cursor.at_rest() else "unknown",
                 "move": "R",
             }))
             cursor.to_right()
+            yield
         cursor.freeze_left()  # "Store" the new result
+
+
+def iter_melody_steps(cursor, *, guitar, allow_open=True, window_size=7,
+                      precheck=True, **kwargs):
+    """Generator that finds the strings of the melody segment
+    starting at the cursor position,
+    performing a single adaptive algorithm step for each iteration.
+    See ``find_strings`` for the remaining parameters.
+    """
+    min_dist_range = 3
+    if precheck:
+        min_dist_range = max(min_dist_range, get_min_dist_range(
+            melody_frets=cursor.get_melody_frets(),
+            window_size=window_size,
+            guitar=guitar,
+            allow_open=allow_open,
+        ))
+    logger.info(json.dumps({
+        "found": "melody",
+        "min_dist_range": min_dist_range,
+    }))
+    for dist_range in count(min_dist_range):
+        logger.info(json.dumps({
+            "processing": "melody",
+            "dist_range": dist_range,
+        }))
+        automaton = AdaptiveFretFinderMelody(
+            cursor=cursor,
+            guitar=guitar,
+            dist_range=dist_range,
+            allow_open=allow_open,
+            window_size=window_size,
+            **kwargs,
+        )
+        yield from automaton.iter_steps()
+        if automaton.state == "accept":
+            logger.info(json.dumps({
+                "processed": "melody",
+                "dist_range": dist_range,
+            }))
+            break
+
+
+def find_strings_batch(staves, guitar, *, max_workers=None, **kwargs):
+    """Apply ``find_strings`` to several staves concurrently
+    using a thread pool (that's mostly useful
+    in free-threaded Python builds, where threads don't share a GIL).
+
+    Parameters
+    ----------
+    staves : iterable of fretfinder.score.Staff
+        The musical staves in which the algorithm should be applied.
+    guitar : fretfinder.guitar.Guitar
+        The guitar model to be used for all staves.
+    max_workers : int or None
+        Maximum number of threads,
+        see ``concurrent.futures.ThreadPoolExecutor``.
+
+    The remaining keyword arguments are passed to ``find_strings``.
+
+    Returns
+    -------
+    A list with the ``find_strings`` result for each staff,
+    in the same order of the input.
+    """
+    solve = partial(find_strings, guitar=guitar, **kwargs)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(solve, staves))
+
+
+async def find_strings_async(staff, guitar, *, yield_every=1000,
+                             yield_interval=None, executor=None, **kwargs):
+    """Coroutine version of ``find_strings``
+    that doesn't block the event loop during long searches.
+
+    Parameters
+    ----------
+    staff : fretfinder.score.Staff
+        The musical staff in which the algorithm should be applied.
+    guitar : fretfinder.guitar.Guitar
+        The guitar model to be used.
+    yield_every : int or None
+        Number of steps (see ``iter_find_strings``)
+        between the moments it yields control to the event loop.
+    yield_interval : float or None
+        Maximum time in seconds between these moments,
+        as an alternative (or complement) to ``yield_every``.
+        At least one of them should be given
+        (otherwise it would block the event loop like ``find_strings``),
+        or a ``ValueError`` is raised.
+    executor : concurrent.futures.Executor or None
+        If given, the algorithm runs in this executor
+        (it should be a thread pool),
+        and the yield parameters are ignored.
+
+    The remaining keyword arguments are passed to ``iter_find_strings``,
+    see ``find_strings`` for more information about them.
+    Cancelling the task stops the algorithm
+    the next time it yields control to the event loop
+    (i.e., after at most ``yield_every`` steps
+    or ``yield_interval`` seconds),
+    or at the next step when it's running in the executor.
+
+    Returns
+    -------
+    The same of ``find_strings``.
+    """
+    if executor is not None:
+        return await find_strings_in_executor(staff, guitar,
+                                              executor=executor, **kwargs)
+    if not yield_every and yield_interval is None:
+        raise ValueError("Either yield_every or yield_interval is required")
+    cursor = IOCursor(staff=staff, guitar=guitar)
+    last_yield = time.monotonic()
+    steps = iter_find_strings(cursor, guitar=guitar, **kwargs)
+    for step, unused in enumerate(steps, 1):
+        if (yield_every and step % yield_every == 0) or (
+            yield_interval is not None and
+            time.monotonic() - last_yield >= yield_interval
+        ):
+            await asyncio.sleep(0)
+            last_yield = time.monotonic()
     return cursor.output_tape
 
 
+async def find_strings_in_executor(staff, guitar, *, executor, **kwargs):
+    """Run ``find_strings`` in the given executor,
+    stopping it at the next step when the task gets cancelled.
+    """
+    cancelled = threading.Event()
+
+    def solve():
+        cursor = IOCursor(staff=staff, guitar=guitar)
+        for unused in iter_find_strings(cursor, guitar=guitar, **kwargs):
+            if cancelled.is_set():
+                return None
+        return cursor.output_tape
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, solve)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+
 class AdaptiveFretFinderMelody(AdaptiveAlgorithm):
     state = "transition"  # Initial state
 
@@ -107,7 +282,7 @@ class AdaptiveFretFinderMelody(AdaptiveAlgorithm):
         self.reverse = reverse
         self.window_size = window_size
         self.distinct_only = distinct_only
-        self.fret_history = []
+        self.fret_history = array("h")
         self.min_x, self.max_x = self.get_valid_range()
 
     def get_transition_string_range(self):
@@ -236,6 +411,49 @@ def get_valid_fret_range(history, *, dist_range, guitar):
     return min_x, max_x
 
 
+def get_min_dist_range(melody_frets, *, window_size, guitar,
+                       allow_open=True):
+    """Find a lower bound for the ``dist_range`` required
+    to play the given melody segment.
+
+    Every pair of notes that aren't played as open strings
+    and whose distance in the melody is up to ``window_size``
+    has both fret numbers in the fret history window of the later one,
+    so all the non-open notes in a group of ``window_size + 1``
+    consecutive notes must fit in a ``dist_range`` fret span.
+    Notes that might be played as open strings are simply ignored.
+    The ``melody_frets`` should be a list of fret numbers lists,
+    one for each note (all notes should be playable).
+    """
+    group = deque(maxlen=max(window_size, 1) + 1)
+    result = 0
+    for frets in melody_frets:
+        playable = {fret for fret in frets
+                    if guitar.min_fret <= fret <= guitar.max_fret}
+        if allow_open and guitar.min_fret in playable:
+            group.append(None)
+            continue
+        group.append(sorted(playable))
+        result = max(result, get_min_fret_span(
+            [el for el in group if el is not None]
+        ))
+    return result
+
+
+def get_min_fret_span(frets_lists):
+    """Smallest ``max_fret - min_fret`` of a choice of one fret
+    from each of the given sorted (and non-empty) fret number lists.
+    """
+    spans = [0]
+    for low in sorted(set().union(*frets_lists)):
+        highs = [next((fret for fret in frets if fret >= low), None)
+                 for frets in frets_lists]
+        if None in highs:
+            break
+        spans.append(max(highs) - low)
+    return min(spans[1:], default=0)
+
+
 def find_multi_fingering(frets_matrix, *, guitar):
     """Get the fingering of a single isolated chord.
 
@@ -0,0 +1,168 @@
+"""Resumable and sharded ``find_strings`` jobs for a corpus of staves.
+
+The corpus is a text file with one staff per line
+(an empty line is an empty staff),
+and each line is identified by its index (starting from zero).
+Each shard processes the lines whose index modulo the number of shards
+is the shard index, appending one JSON line with the result
+for each staff to its own file in the output directory,
+so distinct shards can run in distinct processes or hosts
+sharing the same output directory.
+"""
+import json
+import logging
+import os
+import re
+
+from .algorithm import find_strings
+from .score import Staff
+
+
+logger = logging.getLogger("batch")
+
+SHARD_FILE_NAME = "shard-{index}-of-{count}.jsonl"
+SHARD_FILE_REGEX = re.compile(r"shard-\d+-of-\d+\.jsonl")
+
+
+class IncompleteJobError(Exception):
+    """Attempt to merge the results of a job that hasn't finished."""
+
+
+def parse_shard(shard):
+    """Get the ``(index, count)`` from a ``"index/count"`` string."""
+    match = re.fullmatch(r"(\d+)/(\d+)", shard.strip())
+    if not match:
+        raise ValueError(f"Invalid shard {shard!r}, it should be like 0/4")
+    index, count = map(int, match.groups())
+    if index >= count:
+        raise ValueError(f"Invalid shard {shard!r}, index out of range")
+    return index, count
+
+
+def read_results(path):
+    """Generator of ``(index, strings)`` pairs
+    from a shard results file,
+    ignoring an incomplete last line (from an interrupted job).
+    """
+    with open(path) as results_file:
+        for line in results_file:
+            if not line.endswith("\n"):
+                break
+            record = json.loads(line)
+            yield record["index"], record["strings"]
+
+
+def iter_all_results(output_dir):
+    """Generator of ``(index, strings)`` pairs
+    from all the shard files in the given directory.
+    """
+    if os.path.isdir(output_dir):
+        for file_name in sorted(os.listdir(output_dir)):
+            if SHARD_FILE_REGEX.fullmatch(file_name):
+                yield from read_results(os.path.join(output_dir, file_name))
+
+
+def read_all_results(output_dir):
+    """Dictionary with the results of all the shard files
+    in the given directory, using the staff index as the key.
+    """
+    return dict(iter_all_results(output_dir))
+
+
+def read_done_indices(output_dir):
+    """Set of the staff indices with a result
+    in any shard file of the given directory.
+    """
+    return {index for index, unused in iter_all_results(output_dir)}
+
+
+def remove_incomplete_line(path, chunk_size=4096):
+    """Truncate the file after its last line break, if it exists,
+    reading it backwards in chunks.
+    """
+    if os.path.exists(path):
+        with open(path, "rb+") as results_file:
+            end = results_file.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(0, end - chunk_size)
+                results_file.seek(start)
+                chunk = results_file.read(end - start)
+                if b"\n" in chunk:
+                    results_file.truncate(start + chunk.rfind(b"\n") + 1)
+                    return
+                end = start
+            results_file.truncate(0)
+
+
+def run_shard(corpus, output_dir, *, guitar, shard=(0, 1),
+              checkpoint=100, **kwargs):
+    """Apply ``find_strings`` on the staves of a corpus shard.
+
+    Parameters
+    ----------
+    corpus : str
+        Corpus file name, with one staff per line.
+    output_dir : str
+        Directory for the results, created if it doesn't exist.
+        Staves with a result in any shard file of this directory
+        are skipped, so a restarted job continues where it stopped.
+    guitar : fretfinder.guitar.Guitar
+        The guitar model to be used.
+    shard : tuple
+        The ``(index, count)`` of the shard to be processed.
+    checkpoint : int
+        Number of results between writes to the disk
+        (the results file is flushed and synced),
+        it should be positive.
+
+    The remaining keyword arguments are passed to ``find_strings``,
+    and they should be the same in every run of the same job.
+
+    Returns
+    -------
+    The number of staves processed.
+    """
+    if checkpoint < 1:
+        raise ValueError(f"Invalid checkpoint {checkpoint!r}, "
+                         "it should be positive")
+    shard_index, shard_count = shard
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, SHARD_FILE_NAME.format(
+        index=shard_index,
+        count=shard_count,
+    ))
+    remove_incomplete_line(path)
+    done = read_done_indices(output_dir)
+    processed = 0
+    with open(corpus) as corpus_file, open(path, "a") as results_file:
+        for index, line in enumerate(corpus_file):
+            if index % shard_count != shard_index or index in done:
+                continue
+            staff = Staff(line.strip())
+            strings = find_strings(staff=staff, guitar=guitar, **kwargs)
+            results_file.write(json.dumps({
+                "index": index,
+                "strings": strings,
+            }) + "\n")
+            processed += 1
+            if processed % checkpoint == 0:
+                results_file.flush()
+                os.fsync(results_file.fileno())
+                logger.info(json.dumps({"checkpoint": index}))
+        results_file.flush()
+        os.fsync(results_file.fileno())
+    logger.info(json.dumps({"processed": processed, "done": len(done)}))
+    return processed
+
+
+def merge_shards(corpus, output_dir):
+    """Generator of the ``find_strings`` results of a finished job
+    in the corpus order,
+    raising ``IncompleteJobError`` for missing results.
+    """
+    results = read_all_results(output_dir)
+    with open(corpus) as corpus_file:
+        for index, unused in enumerate(corpus_file):
+            if index not in results:
+                raise IncompleteJobError(f"Missing result for line {index}")
+            yield results[index]
@@ -1,3 +1,6 @@
+from copy import copy
+
+
 class FrozenError(Exception):
     """Attempt to store an output on a frozen cursor position."""
 
@@ -8,6 +11,7 @@ class StaffCursor:
     The only methods that changes its internal state
     are ``to_left`` and ``to_right``.
     """
+    __slots__ = ("staff", "_pos")
 
     def __init__(self, staff):
         self.staff = staff
@@ -47,6 +51,7 @@ class ReadOnlyTabCursor(StaffCursor):
     """StaffCursor that access the staff contents as guitar frets
     found from using a fretfinder.guitar.Guitar instance.
     """
+    __slots__ = ("guitar",)
 
     def __init__(self, staff, guitar):
         super().__init__(staff)
@@ -64,13 +69,23 @@ class ReadOnlyTabCursor(StaffCursor):
         """Checks if all notes of the current position
         can be played by some string (perhaps not all at once).
         """
-        return not all(any(self.guitar.min_fret <= fret <= self.guitar.max_fret
-                           for fret in note_frets)
-                       for note_frets in self.get_all_frets())
+        return not all(map(self.guitar.can_play, self.get_simnotes()))
 
     def at_possible_note(self):
         return self.at_note() and not self.has_impossible_note()
 
+    def get_melody_frets(self):
+        """List of fret numbers lists for the consecutive possible notes
+        starting at the current position (i.e., a melody segment),
+        without changing the cursor position.
+        """
+        cursor = copy(self)
+        result = []
+        while cursor.at_possible_note():
+            result.append(cursor.get_frets())
+            cursor.to_right()
+        return result
+
 
 class IOCursor(ReadOnlyTabCursor):
     """ReadOnlyTabCursor with an extra output tape of string numbers.
@@ -79,11 +94,13 @@ class IOCursor(ReadOnlyTabCursor):
     whose shape is the same of the staff.simnotes
     (i.e., one output for each input note),
     and the default/starting value for all entries is ``-1''.
+    Internally, the entries that weren't stored yet are ``None``.
     """
+    __slots__ = ("_output_tape", "_frozen_until")
 
     def __init__(self, staff, guitar):
         super().__init__(staff, guitar)
-        self._output_tape = {}
+        self._output_tape = [None] * len(staff.simnotes)
         self._frozen_until = -1
 
     def freeze_left(self):
@@ -91,8 +108,10 @@ class IOCursor(ReadOnlyTabCursor):
 
     @property
     def current_output(self):
-        return self._output_tape.get(self._pos,
-                                     [-1] * len(self.get_simnotes()))
+        output = self._output_tape[self._pos]
+        if output is None:
+            return [-1] * len(self.get_simnotes())
+        return output
 
     @current_output.setter
     def current_output(self, value):
@@ -102,5 +121,6 @@ class IOCursor(ReadOnlyTabCursor):
 
     @property
     def output_tape(self):
-        return [self._output_tape.get(idx, [-1] * len(simnotes))
-                for idx, simnotes in enumerate(self.staff.simnotes)]
+        return [[-1] * len(simnotes) if output is None else output
+                for output, simnotes in zip(self._output_tape,
+                                            self.staff.simnotes)]
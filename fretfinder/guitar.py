@@ -20,7 +20,13 @@ class Guitar:
         The tune clamp (capo) number, or zero for a free string.
     max_fret : int
         The number of frets of the guitar.
+
+    Instances aren't changed after their creation
+    (the tuning is stored as tuples),
+    so a single guitar can be shared across threads.
     """
+    __slots__ = ("tuning_name", "tuning", "strings", "midi", "num_strings",
+                 "min_fret", "max_fret")
 
     def __init__(self, tuning_name, *, min_fret=0, max_fret=24):
         self.tuning_name = tuning_name
@@ -33,3 +39,8 @@ class Guitar:
 
     def midi2frets(self, midi):
         return [midi - ref for ref in self.midi]
+
+    def can_play(self, midi):
+        """Checks if the note can be played by some string."""
+        return any(self.min_fret <= fret <= self.max_fret
+                   for fret in self.midi2frets(midi))
@@ -1,8 +1,11 @@
+from collections import Counter
+import json
 import re
+import struct
 
 from audiolazy import str2midi
 
-from .algorithm import find_strings
+from .algorithm import find_strings, find_strings_async
 
 
 class Staff:
@@ -14,67 +17,383 @@ class Staff:
     ``"(C3 G3 E4) (D4 F4) R E4 F4 G4 (Db3 B3 F4) (C3 G3 E4)"``.
     Where the name "R" is reserved for a rest.
 
-    The data is splitten as two lists of lists of simultaneous notes,
+    The data is splitten as two tuples of tuples of simultaneous notes,
     one with the note name strings in the ``simnotes_names`` attribute,
     and one with the MIDI numberings in the ``simnotes`` attribute.
+    These are immutable, so a staff can be shared across threads,
+    and the repeated entries share the same tuples.
     """
+    __slots__ = ("_raw_str", "simnotes_names", "simnotes")
 
     def __init__(self, raw_str):
-        self.raw_str = raw_str
+        self._raw_str = raw_str
         matches = re.finditer(r"(?<=\()[^\)]+(?=\))|(?=R)|[^R ()]+", raw_str)
-        self.simnotes_names = [match.group().split() for match in matches]
-        self.simnotes = [[str2midi(note_name) for note_name in note_names]
-                         for note_names in self.simnotes_names]
+        parsed = {}
+        entries = []
+        for match in matches:
+            note_names = tuple(match.group().split())
+            if note_names not in parsed:
+                parsed[note_names] = (note_names,
+                                      tuple(map(str2midi, note_names)))
+            entries.append(parsed[note_names])
+        self.simnotes_names = tuple(names for names, unused in entries)
+        self.simnotes = tuple(midi for unused, midi in entries)
+
+    @classmethod
+    def from_simnotes(cls, simnotes_names, simnotes):
+        """Create a staff from already parsed data
+        (see the attributes description),
+        whose ``raw_str`` is built only when required.
+        """
+        staff = cls.__new__(cls)
+        staff._raw_str = None
+        staff.simnotes_names = tuple(simnotes_names)
+        staff.simnotes = tuple(simnotes)
+        return staff
+
+    @property
+    def raw_str(self):
+        if self._raw_str is None:
+            self._raw_str = " ".join(
+                "R" if not note_names else
+                note_names[0] if len(note_names) == 1 else
+                "(" + " ".join(note_names) + ")"
+                for note_names in self.simnotes_names
+            )
+        return self._raw_str
+
+    def splice(self, start, stop, other):
+        """New staff with the ``[start:stop]`` range
+        replaced by the contents of the other staff.
+        """
+        return self.from_simnotes(
+            self.simnotes_names[:start] + other.simnotes_names +
+            self.simnotes_names[stop:],
+            self.simnotes[:start] + other.simnotes + self.simnotes[stop:],
+        )
+
+    def __len__(self):
+        return len(self.simnotes)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("Staff indices must be slices")
+        return self.from_simnotes(self.simnotes_names[index],
+                                  self.simnotes[index])
+
+    def __add__(self, other):
+        return self.from_simnotes(self.simnotes_names + other.simnotes_names,
+                                  self.simnotes + other.simnotes)
 
 
 class Tablature:
+    """Guitar tablature for a staff, found by ``find_strings``.
 
-    def __init__(self, *, staff, guitar, **kwargs):
+    The keyword arguments are stored in the ``options`` attribute
+    and passed to ``find_strings``,
+    both when creating the tablature and when editing it.
+
+    The ``replace``, ``insert`` and ``delete`` methods
+    edit the staff (a new ``Staff`` instance is created)
+    and apply the algorithm again only on the melody segments
+    that touch the edited range.
+    As melody segments are bounded by rests, chords and impossible notes,
+    and the result of each segment doesn't depend on anything else,
+    the result is the same as a new tablature for the whole staff.
+    The columns of the cached ``layout`` used for rendering
+    are updated in the same range.
+
+    A previously found ``find_strings`` result can be given
+    as the ``strings`` keyword argument,
+    that's how the ``create_async`` coroutine creates a tablature.
+
+    Unlike the staff and the guitar,
+    a tablature is mutable (it can be edited,
+    and its ``layout`` is built when first required),
+    so it shouldn't be shared across threads without a lock.
+    """
+    __slots__ = ("staff", "guitar", "options", "strings", "_layout")
+
+    def __init__(self, *, staff, guitar, strings=None, **kwargs):
         self.staff = staff
         self.guitar = guitar
-        self.strings = find_strings(staff=staff, guitar=guitar, **kwargs)
+        self.options = kwargs
+        if strings is None:
+            strings = find_strings(staff=staff, guitar=guitar, **kwargs)
+        self.strings = strings
+        self._layout = None
 
-    def string_fret_pairs_lists(self):
-        for strings, simnotes in zip(self.strings, self.staff.simnotes):
+    @classmethod
+    async def create_async(cls, *, staff, guitar, yield_every=1000,
+                           yield_interval=None, executor=None, **kwargs):
+        """Create a tablature without blocking the event loop,
+        see ``fretfinder.algorithm.find_strings_async``.
+        """
+        strings = await find_strings_async(
+            staff=staff,
+            guitar=guitar,
+            yield_every=yield_every,
+            yield_interval=yield_interval,
+            executor=executor,
+            **kwargs,
+        )
+        return cls(staff=staff, guitar=guitar, strings=strings, **kwargs)
+
+    def replace(self, position, notes):
+        """Replace the staff contents starting at the given position
+        with the given notes (a string in the ``Staff`` syntax),
+        one position for each new entry (note, chord or rest).
+        """
+        staff = Staff(notes)
+        start = self.get_position(position)
+        self.splice(start, start + len(staff), staff)
+
+    def insert(self, position, notes):
+        """Insert the given notes (a string in the ``Staff`` syntax)
+        before the given position.
+        """
+        self.splice(position, position, Staff(notes))
+
+    def delete(self, position, size=1):
+        """Remove the ``size`` staff entries starting at ``position``."""
+        start = self.get_position(position)
+        self.splice(start, start + size, Staff(""))
+
+    def get_position(self, position):
+        """Non-negative staff position, where a negative one
+        counts from the end, like a slice index.
+        """
+        return slice(position, None).indices(len(self.staff))[0]
+
+    def splice(self, start, stop, staff):
+        """Replace the ``[start:stop]`` range of the staff
+        with the contents of another staff,
+        updating the strings of the affected melody segments.
+        """
+        start, stop, unused = slice(start, stop).indices(len(self.staff))
+        stop = max(start, stop)
+        self.staff = self.staff.splice(start, stop, staff)
+        self.strings[start:stop] = [None] * len(staff)
+        size_change = len(staff) - (stop - start)
+        start, stop = self.get_segment_range(start, start + len(staff))
+        self.strings[start:stop] = find_strings(
+            staff=self.staff[start:stop],
+            guitar=self.guitar,
+            **self.options,
+        )
+        if self._layout is not None:
+            self._layout.splice(start, stop - size_change,
+                                self.string_fret_pairs_lists(start, stop))
+
+    def get_segment_range(self, start, stop):
+        """Expand the ``[start:stop]`` staff range
+        to include the melody segments that touch it.
+        """
+        while start > 0 and self.at_melody(start - 1):
+            start -= 1
+        while stop < len(self.staff) and self.at_melody(stop):
+            stop += 1
+        return start, stop
+
+    def at_melody(self, index):
+        """Checks if the staff has a possible (single) note
+        in the given position.
+        """
+        simnotes = self.staff.simnotes[index]
+        return len(simnotes) == 1 and self.guitar.can_play(simnotes[0])
+
+    def string_fret_pairs_lists(self, start=0, stop=None):
+        for strings, simnotes in zip(self.strings[start:stop],
+                                     self.staff.simnotes[start:stop]):
             yield [(string_index, midi - self.guitar.midi[string_index])
                    for string_index, midi in zip(strings, simnotes)]
 
+    @property
+    def layout(self):
+        """Cached ``TabLayout`` of this tablature."""
+        if self._layout is None:
+            self._layout = TabLayout(
+                tuning=self.guitar.strings,
+                pairs_lists=self.string_fret_pairs_lists(),
+            )
+        return self._layout
+
     def ascii_tab(self, width=79):
-        # Gets the leading columns with the tuning
-        tuning_length = max(map(len, self.guitar.strings)) + 2
-        tuning_column = [f"{name + '|-': >{tuning_length}}"
-                         for name in self.guitar.strings]
-        available_width = width - tuning_length
-
-        # Create tablature columns (list of strings for each row)
-        # and "lines" (blocks with the given width)
-        tab_columns = []
-        line_slices = []
+        return self.layout.ascii_tab(width=width)
+
+    def to_json(self):
+        return self.layout.to_json()
+
+    def to_bytes(self):
+        return self.layout.to_bytes()
+
+
+class TabLayout:
+    """Width-independent layout of a tablature.
+
+    The ASCII representation of each tablature column
+    (a tuple of strings, one for each guitar string)
+    is built only once, and stored in the ``columns`` attribute,
+    so wrapping the tablature in lines of a given width
+    doesn't need to build it again.
+    Columns with the same pairs share the same tuples,
+    which are kept in the ``shared_entries`` dictionary
+    only while some column uses them
+    (their number of uses is in the ``entry_counts`` counter).
+
+    Parameters
+    ----------
+    tuning : tuple of str
+        Guitar string names (see ``fretfinder.guitar.Guitar.strings``).
+    pairs_lists : iterable of lists of tuples
+        The ``(string_index, fret_number)`` pairs for each tablature column
+        (see ``Tablature.string_fret_pairs_lists``).
+    """
+    __slots__ = ("tuning", "tuning_column", "pairs_lists", "columns",
+                 "shared_entries", "entry_counts")
+    packed_count = struct.Struct("<B")
+    packed_pair = struct.Struct("<bb")
+
+    def __init__(self, *, tuning, pairs_lists):
+        self.tuning = tuning
+        tuning_length = max(map(len, tuning)) + 2
+        self.tuning_column = [f"{name + '|-': >{tuning_length}}"
+                              for name in tuning]
+        self.pairs_lists = []
+        self.columns = []
+        self.shared_entries = {}
+        self.entry_counts = Counter()
+        self.splice(0, 0, pairs_lists)
+
+    def splice(self, start, stop, pairs_lists):
+        """Replace the ``[start:stop]`` range of columns."""
+        entries = [self.get_entry(pairs) for pairs in pairs_lists]
+        self.entry_counts.update(pairs for pairs, unused in entries)
+        for pairs in self.pairs_lists[start:stop]:
+            self.entry_counts[pairs] -= 1
+            if self.entry_counts[pairs] == 0:
+                del self.entry_counts[pairs]
+                del self.shared_entries[pairs]
+        self.pairs_lists[start:stop] = [pairs for pairs, unused in entries]
+        self.columns[start:stop] = [column for unused, column in entries]
+
+    def get_entry(self, pairs):
+        """Shared ``(pairs, column)`` tuples for the given pairs."""
+        pairs = tuple(pairs)
+        if pairs not in self.shared_entries:
+            self.shared_entries[pairs] = pairs, self.build_column(pairs)
+        return self.shared_entries[pairs]
+
+    def build_column(self, pairs):
+        column = ["-"] * len(self.tuning)
+        suffix = "-"
+        for string_index, fret in pairs:
+            if string_index < 0:
+                suffix = "?-"
+            column[string_index] = str(fret)
+        length = max(map(len, column)) + len(suffix)
+        return tuple(f"{el + suffix:-<{length}}" for el in column)
+
+    def get_line_ranges(self, width):
+        """List of ``(start, stop, filler_length)`` tuples
+        with the columns range and the number of "-" to be appended
+        for each line of the tablature with the given width.
+        """
+        available_width = width - len(self.tuning_column[0])
+        result = []
         line_length = line_start = 0
-        for idx, pairs in enumerate(self.string_fret_pairs_lists()):
-            column = ["-"] * len(tuning_column)
-            suffix = "-"
-            for string_index, fret in pairs:
-                if string_index < 0:
-                    suffix = "?-"
-                column[string_index] = str(fret)
-            length = max(map(len, column)) + len(suffix)
-            if line_length + length > available_width - 2:
-                filler = "-" * (available_width - line_length)
-                tab_columns[-1][:] = [el + filler for el in tab_columns[-1]]
+        for idx, column in enumerate(self.columns):
+            length = len(column[0])
+            if line_length + length > available_width - 2 \
+                    and idx > line_start:
+                result.append((line_start, idx,
+                               available_width - line_length))
                 line_length = 0
-                line_slices.append(slice(line_start, idx))
                 line_start = idx
             line_length += length
-            column[:] = [f"{el + suffix:-<{length}}" for el in column]
-            tab_columns.append(column)
-        tab_columns.append(["||"] * len(tuning_column))
-        line_slices.append(slice(line_start, idx + 2))
-
-        # Join the string rows into "lines" and "lines" into the output
-        return "\n\n".join(
-            "\n".join(
-                "".join(el)
-                for el in zip(*([tuning_column] + tab_columns[line_range]))
-            ) for line_range in line_slices
+        result.append((line_start, len(self.columns), 0))
+        return result
+
+    def ascii_tab(self, width=79):
+        lines = []
+        for start, stop, filler_length in self.get_line_ranges(width):
+            line_columns = [self.tuning_column] + self.columns[start:stop]
+            if filler_length > 0:
+                filler = "-" * filler_length
+                line_columns[-1] = [el + filler for el in line_columns[-1]]
+            if stop == len(self.columns):
+                line_columns.append(["||"] * len(self.tuning))
+            lines.append("\n".join(map("".join, zip(*line_columns))))
+        return "\n\n".join(lines)
+
+    def get_output_pairs_lists(self):
+        """Generator of the ``(string_index, fret_number)`` pairs lists
+        where the fret number of an unplaced note
+        (i.e., without a string, whose string index is negative)
+        is ``None``.
+        """
+        for pairs in self.pairs_lists:
+            yield [(string_index, None) if string_index < 0 else
+                   (string_index, fret) for string_index, fret in pairs]
+
+    def to_json(self):
+        """Compact JSON with the ``tuning`` string names
+        and the ``[string_index, fret_number]`` pairs lists
+        of the ``columns``,
+        where an unplaced note is ``[-1, null]``.
+        """
+        return json.dumps({
+            "tuning": self.tuning,
+            "columns": list(self.get_output_pairs_lists()),
+        }, separators=(",", ":"))
+
+    def to_bytes(self):
+        """Packed binary representation of the columns.
+
+        Each column is packed as its number of pairs (unsigned byte)
+        followed by the ``(string_index, fret_number)`` pairs
+        (two signed bytes each), see ``unpack_pairs_lists``.
+        The ``UNPLACED_PAIR`` bytes are reserved for an unplaced note,
+        so the fret numbers should be in the ``[-127, 127]`` range.
+        """
+        return b"".join(
+            self.packed_count.pack(len(pairs)) +
+            b"".join(map(pack_pair, pairs))
+            for pairs in self.get_output_pairs_lists()
         )
+
+
+def pack_pair(pair):
+    """Pack a ``(string_index, fret_number)`` pair
+    of ``TabLayout.get_output_pairs_lists`` as bytes.
+    """
+    string_index, fret = pair
+    if fret is None:
+        return UNPLACED_PAIR
+    if not -127 <= fret <= 127:
+        raise ValueError(f"Fret number {fret} can't be packed")
+    return TabLayout.packed_pair.pack(string_index, fret)
+
+
+def unpack_pairs_lists(data):
+    """Get the ``(string_index, fret_number)`` pairs lists
+    from the ``TabLayout.to_bytes`` result,
+    where an unplaced note is ``(-1, None)``.
+    """
+    result = []
+    offset = 0
+    size = TabLayout.packed_pair.size
+    while offset < len(data):
+        count, = TabLayout.packed_count.unpack_from(data, offset)
+        offset += TabLayout.packed_count.size
+        result.append([
+            (-1, None) if data[start:start + size] == UNPLACED_PAIR else
+            TabLayout.packed_pair.unpack_from(data, start)
+            for start in range(offset, offset + count * size, size)
+        ])
+        offset += count * size
+    return result
+
+
+# The packed (-1, -128) pair, the fret of an unplaced note is unknown
+UNPLACED_PAIR = TabLayout.packed_pair.pack(-1, -128)
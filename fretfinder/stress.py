@@ -0,0 +1,232 @@
+"""Worst-case staff generator and differential harness
+for the ``find_strings`` engines.
+
+Run ``python -m fretfinder.stress --help`` for more information.
+"""
+from functools import partial
+from itertools import islice
+import asyncio
+import json
+import random
+
+from audiolazy import midi2str
+import click
+
+from .algorithm import (find_strings, find_strings_async, find_strings_batch,
+                        iter_find_strings)
+from .cursors import IOCursor
+from .guitar import Guitar
+from .score import Staff, Tablature
+
+
+# Staves found by "python -m fretfinder.stress -n 3 -s 12 -m 5000"
+# (and with "-t Bass4"), using the default guitar/algorithm parameters,
+# where the slow ones take more than a million reference steps
+SLOW_WORST_CASES = [
+    ("Guitar6", "C5 D#5 C6 C5 F4 G#5 C#6 D7 G#5 C#5 F6 F#3"),
+]
+WORST_CASES = [
+    ("Guitar6", "F5 F#3 C6 B4 D#6 C5 A#4 A#3 A3 C#4 B5 A#6"),
+    ("Guitar6", "D6 F3 G#5 A#4 A#4 E5 D5 F5 G#4 A#4 D4 D7"),
+    *SLOW_WORST_CASES,
+    ("Bass4", "C#4 A#3 F2 A3 G3 A#3 A#2 B2 A2 B3 D#5 E2"),
+    ("Bass4", "A3 F#2 A#3 F#3 E4 C4 D4 F3 C#4 A3 G4 E5"),
+    ("Bass4", "D#3 A3 G4 G3 C5 C#4 D#3 F#5 A2 F#2 E4 D3"),
+]
+
+
+def count_steps(staff, guitar, *, max_steps=None, **kwargs):
+    """Number of ``iter_find_strings`` steps required
+    to find the strings of the given staff,
+    stopping at ``max_steps`` (if given).
+    """
+    cursor = IOCursor(staff=staff, guitar=guitar)
+    steps = iter_find_strings(cursor, guitar=guitar, **kwargs)
+    return sum(1 for unused in islice(steps, max_steps))
+
+
+def find_strings_single_batch(staff, guitar, **kwargs):
+    """Find the strings in a worker thread of ``find_strings_batch``."""
+    return find_strings_batch([staff], guitar, **kwargs)[0]
+
+
+def find_strings_in_event_loop(staff, guitar, **kwargs):
+    """Find the strings with ``find_strings_async``
+    in a new event loop, yielding control on every step.
+    """
+    return asyncio.run(find_strings_async(staff, guitar, yield_every=1,
+                                          **kwargs))
+
+
+def find_strings_incremental(staff, guitar, **kwargs):
+    """Find the strings by inserting each staff entry
+    at the end of a tablature.
+    """
+    tab = Tablature(staff=staff[:0], guitar=guitar, **kwargs)
+    for idx in range(len(staff)):
+        tab.splice(idx, idx, staff[idx:idx + 1])
+    return tab.strings
+
+
+ENGINES = {
+    "reference": partial(find_strings, precheck=False),
+    "precheck": find_strings,
+    "batch": find_strings_single_batch,
+    "async": find_strings_in_event_loop,
+    "incremental": find_strings_incremental,
+}
+
+STEP_COUNTERS = {
+    "reference": partial(count_steps, precheck=False),
+    "precheck": count_steps,
+}
+
+
+def compare_engines(staff, guitar, **kwargs):
+    """Apply all the ``ENGINES`` on the given staff.
+
+    Returns
+    -------
+    A dictionary with the ``strings`` found by the reference engine,
+    the number of ``steps`` for each engine in ``STEP_COUNTERS``,
+    and the list of names of the engines with ``mismatches``
+    (whose result differs from the reference one).
+    """
+    results = {name: engine(staff, guitar, **kwargs)
+               for name, engine in ENGINES.items()}
+    return {
+        "strings": results["reference"],
+        "steps": {name: counter(staff, guitar, **kwargs)
+                  for name, counter in STEP_COUNTERS.items()},
+        "mismatches": [name for name, strings in results.items()
+                       if strings != results["reference"]],
+    }
+
+
+def random_staff(rng, guitar, size, *, rest_rate=.05, chord_rate=.05):
+    """Create a random staff with ``size`` entries
+    whose notes can be played in the given guitar,
+    using a ``random.Random`` instance as the ``rng``.
+    """
+    low = min(guitar.midi) + guitar.min_fret
+    high = max(guitar.midi) + guitar.max_fret
+
+    def random_entry():
+        choice = rng.random()
+        if choice < rest_rate:
+            return "R"
+        if choice < rest_rate + chord_rate:
+            notes = rng.sample(range(low, high + 1), rng.randint(2, 3))
+            return "(" + " ".join(map(midi2str, notes)) + ")"
+        return midi2str(rng.randint(low, high))
+
+    return Staff(" ".join(random_entry() for unused in range(size)))
+
+
+def search_worst_staff(guitar, size, *, seed=0, iterations=200,
+                       max_steps=10 ** 5, **kwargs):
+    """Hill climbing search for a melody with ``size`` notes
+    that maximizes the number of steps (see ``count_steps``)
+    required by ``find_strings``,
+    starting from a random melody
+    and replacing a single random note on each iteration.
+    The search stops when a melody requires at least ``max_steps``,
+    since the number of steps can grow exponentially.
+    The remaining keyword arguments are passed to ``find_strings``.
+
+    Returns
+    -------
+    A ``(staff, steps)`` tuple.
+    """
+    rng = random.Random(seed)
+    new_melody = partial(random_staff, rng, guitar,
+                         rest_rate=0, chord_rate=0)
+    staff = new_melody(size)
+    steps = count_steps(staff, guitar, max_steps=max_steps, **kwargs)
+    for unused in range(iterations):
+        if steps >= max_steps:
+            break
+        idx = rng.randrange(size)
+        candidate = staff[:idx] + new_melody(1) + staff[idx + 1:]
+        candidate_steps = count_steps(candidate, guitar,
+                                      max_steps=max_steps, **kwargs)
+        if candidate_steps >= steps:
+            staff, steps = candidate, candidate_steps
+    return staff, steps
+
+
+@click.command()
+@click.option(
+    "--tuning", "-t",
+    default="Guitar6",
+    show_default=True,
+    help="Guitar tuning name or whitespace-separated note names.",
+)
+@click.option(
+    "--size", "-s",
+    default=16,
+    show_default=True,
+    help="Number of notes of each generated melody.",
+)
+@click.option(
+    "--searches", "-n",
+    default=1,
+    show_default=True,
+    help="Number of hill climbing searches, "
+         "each one seeded by a distinct number, "
+         "starting from the given seed.",
+)
+@click.option(
+    "--seed",
+    default=0,
+    show_default=True,
+    help="First seed for the random number generator.",
+)
+@click.option(
+    "--iterations", "-i",
+    default=200,
+    show_default=True,
+    help="Number of mutations tried in each search.",
+)
+@click.option(
+    "--max-steps", "-m",
+    default=10 ** 5,
+    show_default=True,
+    help="Number of steps that stops a search.",
+)
+@click.option(
+    "--fixed/--search", "-f",
+    default=False,
+    show_default=True,
+    help="Run the differential harness on the fixed worst cases "
+         "instead of searching for new ones.",
+)
+def main(*, tuning, size, searches, seed, iterations, max_steps, fixed):
+    """Search for staves that maximize the number of algorithm steps,
+    and compare the result of all the engines for them,
+    writing a JSON line for each staff.
+    The exit status is 1 if any result mismatch was found.
+    """
+    if fixed:
+        cases = [(Guitar(name), Staff(raw_str))
+                 for name, raw_str in WORST_CASES]
+    else:
+        guitar = Guitar(tuning)
+        cases = [(guitar, search_worst_staff(guitar, size, seed=case_seed,
+                                             iterations=iterations,
+                                             max_steps=max_steps)[0])
+                 for case_seed in range(seed, seed + searches)]
+    failed = False
+    for guitar, staff in cases:
+        report = compare_engines(staff, guitar)
+        failed = failed or bool(report["mismatches"])
+        click.echo(json.dumps({
+            "tuning": guitar.tuning_name,
+            "staff": staff.raw_str,
+            **report,
+        }))
+    raise SystemExit(int(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -83,3 +83,15 @@ def test_parentheses_match(input_string, expected_result, expected_output):
     result = ParenthesesMatcher(cursor).run()
     assert result is expected_result
     assert cursor.output_tape == expected_output
+
+
+def test_subclass_handlers_dont_change_parent():
+
+    class ExtendedMatcher(ParenthesesMatcher):
+        @AAStateHandler
+        def extra(self):
+            return StateHandlerResult(next_state="accept")
+
+    assert "extra" in ExtendedMatcher.state_handlers
+    assert "start" in ExtendedMatcher.state_handlers
+    assert "extra" not in ParenthesesMatcher.state_handlers
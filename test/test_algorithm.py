@@ -0,0 +1,151 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import random
+import sys
+import time
+
+import pytest
+
+from fretfinder.algorithm import (find_strings, find_strings_async,
+                                  find_strings_batch, get_min_dist_range,
+                                  get_min_fret_span)
+from fretfinder.guitar import Guitar
+from fretfinder.score import Staff, Tablature
+from fretfinder.stress import SLOW_WORST_CASES
+
+
+# It takes more than a million steps without the dist_range precheck
+SLOW_TUNING, SLOW_RAW_STR = SLOW_WORST_CASES[0]
+SLOW_STAFF = Staff(SLOW_RAW_STR)
+
+
+@pytest.mark.parametrize("frets_lists, expected_result", [
+    ([], 0),
+    ([[5]], 0),
+    ([[0, 5, 10], [7, 12]], 2),
+    ([[1, 13], [6, 18], [9, 21]], 7),
+])
+def test_get_min_fret_span(frets_lists, expected_result):
+    assert get_min_fret_span(frets_lists) == expected_result
+
+
+@pytest.mark.parametrize("raw_str, window_size, allow_open, expected", [
+    ("A3 C4 D4 E4 F4 E4 D4", 7, True, 3),
+    ("G2 G4", 7, False, 9),
+    ("G2 G4", 0, False, 9),
+    ("G2 E3 G4", 1, False, 1),
+    ("G2 E3 G4", 2, False, 9),
+    ("G2 A2 G4", 1, False, 7),
+    ("G2 A2 G4", 1, True, 0),
+])
+def test_get_min_dist_range(raw_str, window_size, allow_open, expected):
+    guitar = Guitar("Bass4", max_fret=14)
+    melody_frets = [guitar.midi2frets(note)
+                    for note, in Staff(raw_str).simnotes]
+    assert get_min_dist_range(
+        melody_frets=melody_frets,
+        window_size=window_size,
+        guitar=guitar,
+        allow_open=allow_open,
+    ) == expected
+
+
+@pytest.mark.parametrize("raw_str, tuning, kwargs", [
+    ("G2 E3 G4 R G2 C4 Bb4 (C3 E3) D5 A2 F4", "Bass4",
+     {"window_size": 2, "allow_open": False}),
+    ("E3 C6 F3 B5 G3 A5 R E5 E3 E6", "Guitar6",
+     {"reverse": True, "distinct_only": True}),
+    ("E3 C6 F3 B5 G3 A5 R E5 E3 E6", "Guitar6",
+     {"window_size": 1, "allow_open": False}),
+])
+def test_precheck_keeps_result(raw_str, tuning, kwargs):
+    staff = Staff(raw_str)
+    guitar = Guitar(tuning)
+    assert find_strings(staff, guitar, precheck=False, **kwargs) \
+        == find_strings(staff, guitar, **kwargs)
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.mark.usefixtures("frequent_thread_switches")
+@pytest.mark.parametrize("tuning", ["Guitar6", "Bass4"])
+def test_find_strings_batch_stress(tuning):
+    guitar = Guitar(tuning, max_fret=14)
+    rng = random.Random(tuning)
+    names = "C D E F G A B Db Eb Gb Ab Bb".split()
+    staves = [
+        Staff(" ".join(rng.choice(names) + str(rng.randint(2, 5))
+                       for unused in range(rng.randint(1, 40))))
+        for unused in range(100)
+    ]
+    kwargs = {"reverse": True, "window_size": 4}
+    expected = [find_strings(staff, guitar, **kwargs) for staff in staves]
+    result = find_strings_batch(staves, guitar, max_workers=16, **kwargs)
+    assert result == expected
+
+
+@pytest.mark.parametrize("use_executor, kwargs", [
+    (False, {"yield_every": 50}),
+    (False, {"yield_every": None, "yield_interval": 1e-4}),
+    (True, {}),
+])
+def test_find_strings_async_shares_the_event_loop(use_executor, kwargs):
+    guitar = Guitar(SLOW_TUNING)
+    executor = ThreadPoolExecutor(max_workers=1) if use_executor else None
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def solve():
+        ticker_task = asyncio.ensure_future(ticker())
+        tab = await Tablature.create_async(staff=SLOW_STAFF, guitar=guitar,
+                                           executor=executor, **kwargs)
+        ticker_task.cancel()
+        return tab
+
+    try:
+        tab = asyncio.run(solve())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    assert tab.strings == find_strings(SLOW_STAFF, guitar)
+    assert len(ticks) > 1
+
+
+def test_find_strings_async_requires_yielding():
+    with pytest.raises(ValueError):
+        asyncio.run(find_strings_async(Staff("A3"), Guitar("Guitar6"),
+                                       yield_every=None))
+
+
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_find_strings_async_cancel(use_executor):
+    executor = ThreadPoolExecutor(max_workers=1) if use_executor else None
+
+    async def solve_and_cancel():
+        task = asyncio.ensure_future(find_strings_async(
+            SLOW_STAFF, Guitar(SLOW_TUNING),
+            executor=executor,
+            precheck=False,
+        ))
+        await asyncio.sleep(.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.monotonic()
+    try:
+        asyncio.run(solve_and_cancel())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    assert time.monotonic() - start < 5
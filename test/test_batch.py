@@ -0,0 +1,113 @@
+import json
+
+from click.testing import CliRunner
+import pytest
+
+from fretfinder.__main__ import main
+from fretfinder.algorithm import find_strings
+from fretfinder.batch import (IncompleteJobError, merge_shards, parse_shard,
+                              remove_incomplete_line, run_shard)
+from fretfinder.guitar import Guitar
+from fretfinder.score import Staff
+
+
+CORPUS = [
+    "A3 C4 D4 E4 F4 E4 D4",
+    "",
+    "(C3 G3 E4) (D4 F4) R E4 F4 G4 (Db3 B3 F4) (C3 G3 E4)",
+    "E3 C6 F3 B5 G3 A5 R E5 E3 E6",
+    "G2 E3 G4",
+]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_text("\n".join(CORPUS) + "\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("shard, expected", [
+    ("0/1", (0, 1)),
+    (" 2/3 ", (2, 3)),
+])
+def test_parse_shard(shard, expected):
+    assert parse_shard(shard) == expected
+
+
+@pytest.mark.parametrize("shard", ["1", "3/3", "-1/2", "a/b"])
+def test_parse_shard_invalid(shard):
+    with pytest.raises(ValueError):
+        parse_shard(shard)
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("", ""),
+    ("incomplete", ""),
+    ("first line\n", "first line\n"),
+    ("first line\nsecond line\n", "first line\nsecond line\n"),
+    ("first line\nsecond line\nincomplete", "first line\nsecond line\n"),
+    ("first line\n" + "x" * 10, "first line\n"),
+])
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_remove_incomplete_line(tmp_path, content, expected, chunk_size):
+    path = tmp_path / "shard-0-of-1.jsonl"
+    path.write_text(content)
+    remove_incomplete_line(str(path), chunk_size=chunk_size)
+    assert path.read_text() == expected
+
+
+def test_sharded_job_restart_and_merge(corpus, tmp_path):
+    guitar = Guitar("Guitar6")
+    output_dir = str(tmp_path / "output")
+    expected = [find_strings(Staff(raw_str), guitar) for raw_str in CORPUS]
+
+    assert run_shard(corpus, output_dir, guitar=guitar, shard=(1, 2)) == 2
+    with pytest.raises(IncompleteJobError):
+        list(merge_shards(corpus, output_dir))
+
+    # Simulates an interrupted job (with a partially written line)
+    assert run_shard(corpus, output_dir, guitar=guitar, shard=(0, 2),
+                     checkpoint=1) == 3
+    shard_path = tmp_path / "output" / "shard-0-of-2.jsonl"
+    lines = shard_path.read_text().splitlines(keepends=True)
+    shard_path.write_text("".join(lines[:-1]) + lines[-1][:5])
+
+    assert run_shard(corpus, output_dir, guitar=guitar, shard=(0, 2)) == 1
+    assert run_shard(corpus, output_dir, guitar=guitar, shard=(0, 2)) == 0
+    assert list(merge_shards(corpus, output_dir)) == expected
+
+
+@pytest.mark.parametrize("checkpoint", [0, -1])
+def test_run_shard_invalid_checkpoint(corpus, tmp_path, checkpoint):
+    with pytest.raises(ValueError):
+        run_shard(corpus, str(tmp_path / "output"), guitar=Guitar("Guitar6"),
+                  checkpoint=checkpoint)
+
+
+def test_cli_invalid_checkpoint(corpus, tmp_path):
+    result = CliRunner().invoke(main, ["batch", "-c", "0", corpus,
+                                       str(tmp_path / "output")])
+    assert result.exit_code == 2
+    assert not (tmp_path / "output").exists()
+
+
+def test_cli_default_command():
+    result = CliRunner().invoke(main, ["-rt", "Bass4", "-M14", "A3 C4"])
+    assert result.exit_code == 0
+    assert result.output.splitlines()[1] == "D3|----10-||"
+
+
+def test_cli_batch_and_merge(corpus, tmp_path):
+    output_dir = str(tmp_path / "output")
+    runner = CliRunner()
+    for shard in ["0/2", "1/2"]:
+        result = runner.invoke(main, ["batch", "-rt", "Bass4", "-s", shard,
+                                      corpus, output_dir])
+        assert result.exit_code == 0
+    result = runner.invoke(main, ["merge", corpus, output_dir])
+    assert result.exit_code == 0
+    assert [json.loads(line) for line in result.output.splitlines()] == [
+        find_strings(Staff(raw_str), Guitar("Bass4"), reverse=True)
+        for raw_str in CORPUS
+    ]
@@ -0,0 +1,117 @@
+import json
+import random
+
+import pytest
+
+from fretfinder.guitar import Guitar
+from fretfinder.score import (UNPLACED_PAIR, Staff, Tablature,
+                              unpack_pairs_lists)
+
+
+def test_staff_slicing_and_joining():
+    staff = Staff("(C3 G3 E4) (D4 F4) R E4 F4 G4 (Db3 B3 F4) (C3 G3 E4)")
+    joined = staff[:3] + Staff("A3") + staff[5:]
+    assert joined.raw_str == \
+        "(C3 G3 E4) (D4 F4) R A3 G4 (Db3 B3 F4) (C3 G3 E4)"
+    assert joined.simnotes == Staff(joined.raw_str).simnotes
+    assert len(joined) == 7
+
+
+def test_staff_raw_str_is_lazy():
+    staff = Staff("A3 (C4 E4) R").splice(1, 2, Staff("D4"))
+    assert staff._raw_str is None
+    assert staff.raw_str == "A3 D4 R"
+
+
+@pytest.mark.parametrize("method, args, expected_raw_str", [
+    ("replace", (1, "C4 R"), "A3 C4 R E4 F4 E4 D4"),
+    ("insert", (0, "(E2 B2)"), "(E2 B2) A3 C4 D4 E4 F4 E4 D4"),
+    ("replace", (-1, "G4"), "A3 C4 D4 E4 F4 E4 G4"),
+    ("delete", (2, 3), "A3 C4 E4 D4"),
+    ("delete", (-1,), "A3 C4 D4 E4 F4 E4"),
+    ("delete", (-3, 2), "A3 C4 D4 E4 D4"),
+])
+def test_tablature_edits(method, args, expected_raw_str):
+    guitar = Guitar("Bass4", max_fret=14)
+    tab = Tablature(staff=Staff("A3 C4 D4 E4 F4 E4 D4"), guitar=guitar,
+                    reverse=True)
+    getattr(tab, method)(*args)
+    assert tab.staff.raw_str == expected_raw_str
+    assert tab.strings == Tablature(staff=Staff(expected_raw_str),
+                                    guitar=guitar, reverse=True).strings
+
+
+@pytest.mark.parametrize("tuning", ["Guitar6", "Bass4"])
+def test_tablature_random_edits(tuning):
+    guitar = Guitar(tuning, max_fret=14)
+    kwargs = {"window_size": 3, "allow_open": False}
+    rng = random.Random(tuning)
+    names = "C D E F G A B Db Eb Gb Ab Bb".split()
+
+    def random_notes():
+        return " ".join(
+            rng.choice(["R", "(C3 E4)"]) if rng.random() < .1 else
+            rng.choice(names) + str(rng.randint(2, 5))
+            for unused in range(rng.randint(0, 4))
+        )
+
+    tab = Tablature(staff=Staff(random_notes()), guitar=guitar, **kwargs)
+    tab.ascii_tab()  # Builds the layout before editing
+    for unused in range(50):
+        position = rng.randint(0, len(tab.staff))
+        method = rng.choice(["replace", "insert", "delete"])
+        if method == "delete":
+            tab.delete(position, rng.randint(0, 3))
+        else:
+            getattr(tab, method)(position, random_notes())
+        expected = Tablature(staff=Staff(tab.staff.raw_str), guitar=guitar,
+                             **kwargs)
+        assert tab.strings == expected.strings
+        assert tab.ascii_tab(width=40) == expected.ascii_tab(width=40)
+        assert tab.layout.shared_entries.keys() == \
+            set(tab.layout.pairs_lists)
+
+
+def test_ascii_tab_wrapping():
+    tab = Tablature(staff=Staff("A3 C4 D4 (A2 E3) R E4 F4 C1"),
+                    guitar=Guitar("Bass4", max_fret=14), reverse=True)
+    assert tab.ascii_tab(width=22) == "\n".join([
+        "G3|--------------9----",
+        "D3|----10-12-2--------",
+        "A2|-12-------0--------",
+        "E2|-------------------",
+        "",
+        "G3|-10--?---||",
+        "D3|-----?---||",
+        "A2|-----?---||",
+        "E2|-----16?-||",
+    ])
+
+
+def test_json_and_bytes_outputs():
+    tab = Tablature(staff=Staff("A3 (C4 E4) R F1"), guitar=Guitar("Bass4"))
+    expected = [[(0, 2)], [(1, 10), (0, 9)], [], [(-1, None)]]
+    assert json.loads(tab.to_json()) == {
+        "tuning": ["G3", "D3", "A2", "E2"],
+        "columns": [[list(pair) for pair in pairs] for pairs in expected],
+    }
+    assert unpack_pairs_lists(tab.to_bytes()) == expected
+    assert tab.to_bytes()[-2:] == UNPLACED_PAIR
+
+
+def test_bytes_output_fret_range():
+    guitar = Guitar("Guitar6", max_fret=200)
+    tab = Tablature(staff=Staff("B12"), guitar=guitar)
+    assert unpack_pairs_lists(tab.to_bytes()) == [[(0, 91)]]
+    with pytest.raises(ValueError):
+        Tablature(staff=Staff("C16"), guitar=guitar).to_bytes()
+
+
+def test_compact_objects():
+    staff = Staff("A3 C4 A3 (C3 E3) (C3 E3)")
+    assert staff.simnotes[0] is staff.simnotes[2]
+    assert staff.simnotes_names[3] is staff.simnotes_names[4]
+    tab = Tablature(staff=staff, guitar=Guitar("Guitar6"))
+    assert tab.layout.columns[0] is tab.layout.columns[2]
+    for obj in [staff, tab, tab.guitar, tab.layout]:
+        assert not hasattr(obj, "__dict__")
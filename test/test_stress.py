@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from fretfinder.guitar import Guitar
+from fretfinder.score import Staff
+from fretfinder.stress import (compare_engines, count_steps, random_staff,
+                               search_worst_staff, SLOW_WORST_CASES,
+                               WORST_CASES)
+
+
+@pytest.mark.parametrize("tuning, raw_str", [
+    pytest.param(*case, marks=pytest.mark.skip(
+        reason="it takes more than a million reference steps",
+    )) if case in SLOW_WORST_CASES else case
+    for case in WORST_CASES
+])
+def test_worst_cases_engines_match(tuning, raw_str):
+    report = compare_engines(Staff(raw_str), Guitar(tuning))
+    assert report["mismatches"] == []
+    assert report["steps"]["precheck"] <= report["steps"]["reference"]
+
+
+@pytest.mark.parametrize("tuning", ["Guitar6", "Bass4"])
+def test_random_staves_engines_match(tuning):
+    guitar = Guitar(tuning, max_fret=14)
+    rng = random.Random(tuning)
+    for unused in range(5):
+        staff = random_staff(rng, guitar, 12, rest_rate=.1, chord_rate=.1)
+        report = compare_engines(staff, guitar, window_size=3)
+        assert report["mismatches"] == []
+
+
+def test_search_worst_staff():
+    guitar = Guitar("Bass4")
+    staff, steps = search_worst_staff(guitar, 8, seed=1, iterations=20)
+    assert len(staff) == 8
+    assert steps == count_steps(staff, guitar)
+    assert steps >= count_steps(
+        random_staff(random.Random(1), guitar, 8, rest_rate=0, chord_rate=0),
+        guitar,
+    )